@@ -1,96 +1,791 @@
+import hashlib
+import importlib.util
+import json
+import mmap
+import multiprocessing
 import os
+import queue
+import struct
 import sys
-from tkinter import StringVar, Tk, filedialog, messagebox, ttk
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from importlib import import_module
+from itertools import islice
+from os.path import abspath, join, normpath, relpath, splitext
+from tkinter import StringVar, Tk, Toplevel, ttk
+from tkinter.scrolledtext import ScrolledText
 
 from mutagen._file import File as MutagenFile
-from mutagen.id3 import ID3
-from mutagen.id3._frames import APIC
-from mutagen.mp3 import MP3
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# mutagen-rs parses tags natively and mirrors mutagen's read API, so use it
+# for read-only work when installed. Writes always go through mutagen.
+try:
+    from mutagen_rs import File as ReadOnlyMutagenFile
+except ImportError:
+    ReadOnlyMutagenFile = MutagenFile
+
+
+def lazy_import(module_name):
+    """Return a module that is only imported once it is first used."""
+
+    spec = importlib.util.find_spec(module_name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    loader.exec_module(module)
+    return module
+
+
+# The dialogs are only needed once the user clicks something
+filedialog = lazy_import('tkinter.filedialog')
+messagebox = lazy_import('tkinter.messagebox')
 
 # Constants
 COVER_ART_DIR = 'cover_art'
-AUDIO_FILE_PATTERN = '*.mp3 *.flac *.ogg *.m4a *.mp4 *.wav'
-AUDIO_EXTENSIONS = tuple(AUDIO_FILE_PATTERN.replace('*', '').split())
+AUDIO_EXTENSIONS = ('.mp3', '.flac', '.ogg', '.m4a', '.mp4', '.wav')
+AUDIO_FILE_PATTERN = ' '.join(
+    f'*{extension}' for extension in AUDIO_EXTENSIONS
+)
+AUDIO_EXTENSION_SET = frozenset(AUDIO_EXTENSIONS)
 IMAGE_FILE_PATTERN = '*.jpg *.jpeg *.png'
+METADATA_FIELDS = ('title', 'artist', 'album', 'genre', 'date')
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF8', 'image/gif'),
+)
+COVER_INDEX_PATH = join(COVER_ART_DIR, '.index.json')
+# Operations that have nothing to do for files known to have no cover art
+COVER_INDEX_SKIPPABLE_OPERATIONS = ('COPY', 'DELETE', 'EXTRACT')
+# Files with the same size and leading bytes are treated as duplicates
+DUPLICATE_HASH_SIZE = 64 * 1024
+# Batches smaller than this are not worth the cost of starting workers
+PARALLEL_MIN_FILES = 8
+PARALLEL_CHUNK_SIZE = 32
+SAVE_ATTEMPTS = 3
+READ_BUFFER_SIZE = 64 * 1024
+MIN_TAG_PADDING = 4096
+MAX_QUEUED_WRITES = 32
+# Parsed files can hold multi-megabyte covers, so keep the cache modest
+AUDIO_FILE_CACHE_SIZE = 128
+RESULT_POLL_INTERVAL_MS = 100
+RESULTS_PER_TICK = 100
+ID3_HEADER = struct.Struct('>3sBBBI')
+ID3_HEADER_SIZE = ID3_HEADER.size
+ID3_FRAME_HEADER = struct.Struct('>4sIH')
+ID3_FRAME_HEADER_SIZE = ID3_FRAME_HEADER.size
+UINT32 = struct.Struct('>I')
+# Start of the file, where ID3v2 tags live, for the OS to prefetch
+ID3_READAHEAD_SIZE = 64 * 1024
+ID3_UNSYNC_FLAG = 0x80
+ID3_EXTENDED_HEADER_FLAG = 0x40
+# Grouping, compression, encryption, unsynchronisation and data length
+# indicator bits
+ID3_FRAME_FORMAT_FLAGS = {3: 0x00E0, 4: 0x004F}
+# Codec of each ID3v2 text encoding byte
+APIC_TEXT_ENCODINGS = ('latin-1', 'utf-16', 'utf-16-be', 'utf-8')
+# A synchsafe integer never has the top bit of any of its bytes set
+SYNCHSAFE_INVALID_BITS = 0x80808080
+
+# Parser module and class per extension, so mutagen does not have to sniff
+# the file type. Each format module is imported the first time it is needed
+AUDIO_PARSERS = {
+    '.mp3': ('mutagen.mp3', 'MP3'),
+    '.flac': ('mutagen.flac', 'FLAC'),
+    '.ogg': ('mutagen.oggvorbis', 'OggVorbis'),
+    '.m4a': ('mutagen.mp4', 'MP4'),
+    '.mp4': ('mutagen.mp4', 'MP4'),
+    '.wav': ('mutagen.wave', 'WAVE'),
+}
+EASY_AUDIO_PARSERS = {
+    **AUDIO_PARSERS,
+    '.mp3': ('mutagen.mp3', 'EasyMP3'),
+    '.m4a': ('mutagen.easymp4', 'EasyMP4'),
+    '.mp4': ('mutagen.easymp4', 'EasyMP4'),
+}
+
+# Operations return (status, path, detail) tuples, rendered with these
+# messages only when shown. detail is the output path for COPY and EXTRACT,
+# the reason for SKIP and the error text for ERROR.
+RESULT_MESSAGES = {
+    'COPY': 'Cover art saved to "{detail}"',
+    'DELETE': 'Cover art removed from "{path}"',
+    'EXTRACT': 'Cover art saved to "{detail}" and removed from "{path}"',
+    'REPLACE': 'Cover art replaced in "{path}"',
+    'UPDATE': 'Metadata saved in "{path}"',
+    'ERROR': 'Failed on "{path}": {detail}',
+}
+SKIP_MESSAGES = {
+    'no-tags': 'No tags in "{path}"',
+    'no-cover': 'No cover art in "{path}"',
+    'unchanged': 'No cover art in "{path}" (unchanged)',
+    'unsupported': 'Tag format does not support cover deletion: "{path}"',
+}
+NO_COVER_SKIP_REASONS = ('no-tags', 'no-cover', 'unchanged')
+
+# Windows needs O_BINARY for raw descriptors; it does not exist elsewhere
+O_BINARY = getattr(os, 'O_BINARY', 0)
 
 # Ensure cover_art directory exists
 os.makedirs(COVER_ART_DIR, exist_ok=True)
 
+# Cover images and tag saves run in the background while the next file is
+# parsed; pending_writes maps each written path to its future.
+io_pool = ThreadPoolExecutor(max_workers=4)
+io_slots = threading.BoundedSemaphore(MAX_QUEUED_WRITES)
+pending_writes = {}
 
-def copy_cover_art(file_path):
-    """Copy and save the first APIC frame (cover art) from the audio file."""
+# Cover output folder per source folder and picked folders, created on
+# first use
+cover_output_directories = {}
+
+# Parsed audio files reused within a session, most recently used last
+audio_file_cache = OrderedDict()
+audio_file_cache_lock = threading.Lock()
+
+
+def format_result(result):
+    """Render a (status, path, detail) operation result for display."""
+
+    status, path, detail = result
+    if status == 'SKIP':
+        message = SKIP_MESSAGES[detail]
+    else:
+        message = RESULT_MESSAGES[status]
+    return f'[{status}] ' + message.format(path=path, detail=detail)
+
+
+def write_bytes(output_path, data):
+    """Write data to output_path through an unbuffered file descriptor."""
 
+    file_descriptor = os.open(
+        output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | O_BINARY, 0o644
+    )
     try:
-        audio_file = MutagenFile(file_path)
-        if not audio_file or not audio_file.tags:
-            return f'[SKIP] No tags in "{file_path}"'
+        remaining = memoryview(data)
+        if remaining.nbytes and hasattr(os, 'posix_fallocate'):
+            # Reserve the final size up front for a contiguous layout
+            try:
+                os.posix_fallocate(file_descriptor, 0, remaining.nbytes)
+            except OSError:
+                pass
+        while remaining:
+            remaining = remaining[os.write(file_descriptor, remaining) :]
+    finally:
+        os.close(file_descriptor)
+
+
+def is_os_error(error):
+    """Whether error is an OSError or was raised by mutagen for one."""
+
+    return isinstance(error, OSError) or isinstance(
+        error.__cause__ or error.__context__, OSError
+    )
+
+
+def save_with_retry(audio_file, file_path, **save_options):
+    """Save the audio file, retrying OS errors with exponential backoff.
+
+    Antivirus scanners and sync clients can lock a file for a moment, so a
+    failed save is retried a few times before giving up.
+    """
+
+    evict_cached_audio_file(file_path)
+    for attempt in range(SAVE_ATTEMPTS):
+        try:
+            audio_file.save(file_path, **save_options)
+            return
+        except Exception as error_info:
+            if attempt == SAVE_ATTEMPTS - 1 or not is_os_error(error_info):
+                raise
+            time.sleep(2**attempt)
+
+
+def queue_io(path, function, *args, **kwargs):
+    """Run a function writing to path on the I/O pool without waiting."""
+
+    previous_write = pending_writes.get(path)
+    if previous_write is not None:
+        # Keep writes to the same path in order
+        wait([previous_write])
+    # Bound the queued writes so their payloads cannot pile up in memory
+    io_slots.acquire()
+    write_future = io_pool.submit(function, *args, **kwargs)
+    write_future.add_done_callback(lambda _: io_slots.release())
+    pending_writes[path] = write_future
+    return write_future
+
+
+def queue_write(output_path, data):
+    return queue_io(output_path, write_bytes, output_path, data)
+
+
+def queue_save(file_path, audio_file, **save_options):
+    return queue_io(
+        file_path, save_with_retry, audio_file, file_path, **save_options
+    )
+
+
+def release_after_writes(view, write_futures):
+    """Release view once all of the writes reading from it are done.
+
+    A view into a mapped file keeps the whole map alive, so it is dropped
+    as soon as the last write finishes instead of whenever it is collected.
+    """
+
+    remaining = [len(write_futures)]
+    remaining_lock = threading.Lock()
+
+    def release_if_last(_):
+        with remaining_lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        view.release()
+
+    for write_future in write_futures:
+        write_future.add_done_callback(release_if_last)
+
+
+def wait_for_pending_writes():
+    """Wait for all queued writes; return {path: result} for failed ones."""
+
+    errors = {}
+    for path in list(pending_writes):
+        # Another batch thread may have collected this write already
+        write_future = pending_writes.pop(path, None)
+        if write_future is None:
+            continue
+        try:
+            write_future.result()
+        except Exception as error_info:
+            errors[path] = ('ERROR', path, str(error_info))
+    return errors
+
+
+def get_audio_parser(extension, easy=False):
+    """Return the mutagen class for a file extension, or None if unknown."""
+
+    parser_name = (EASY_AUDIO_PARSERS if easy else AUDIO_PARSERS).get(
+        extension
+    )
+    if parser_name is None:
+        return None
+    module_name, class_name = parser_name
+    return getattr(import_module(module_name), class_name)
+
+
+def load_audio_file(file_path, easy=False, parser=None):
+    """Load the audio file through a large buffered reader.
+
+    Handing mutagen an open file with a 64 KiB buffer keeps its many small
+    tag reads from turning into separate system calls on network mounts.
+    The parser is picked from the file extension, falling back to
+    mutagen's type sniffing when there is none or it fails. A parser such
+    as MP3 can also be given explicitly, in which case it must succeed.
+    """
+
+    guessed_parser = parser is None
+    if guessed_parser:
+        parser = get_audio_parser(splitext(file_path)[1].lower(), easy)
+
+    with open(file_path, 'rb', buffering=READ_BUFFER_SIZE) as audio_file:
+        if parser is None:
+            return MutagenFile(audio_file, easy=easy)
+        try:
+            return parser(audio_file)
+        except Exception:
+            if not guessed_parser:
+                raise
+            # Misleading extension, e.g. Opus in a .ogg file: let mutagen
+            # sniff the real type
+            audio_file.seek(0)
+            return MutagenFile(audio_file, easy=easy)
+
+
+def read_audio_file(file_path):
+    """Load the audio file for reading only, with mutagen-rs if present."""
+
+    if ReadOnlyMutagenFile is MutagenFile:
+        return load_cached_audio_file(file_path)
+    return ReadOnlyMutagenFile(file_path)
+
+
+def load_cached_audio_file(file_path, easy=False, for_update=False):
+    """Load the audio file, reusing an earlier parse if it is unchanged.
+
+    Entries are keyed on the path and remember the mtime and size they
+    were parsed at, so files changed on disk are parsed again. Callers
+    that modify the returned object pass for_update, which takes it out of
+    the cache so no other thread can be handed it mid-edit.
+    """
+
+    file_stat = os.stat(file_path)
+    signature = (file_stat.st_mtime_ns, file_stat.st_size)
+    cache_key = (file_path, easy)
+    with audio_file_cache_lock:
+        if for_update:
+            cached = audio_file_cache.pop(cache_key, None)
+        else:
+            cached = audio_file_cache.get(cache_key)
+        if cached is not None and cached[0] == signature:
+            if not for_update:
+                audio_file_cache.move_to_end(cache_key)
+            return cached[1]
+
+    audio_file = load_audio_file(file_path, easy=easy)
+    if for_update:
+        return audio_file
+    with audio_file_cache_lock:
+        audio_file_cache[cache_key] = (signature, audio_file)
+        audio_file_cache.move_to_end(cache_key)
+        while len(audio_file_cache) > AUDIO_FILE_CACHE_SIZE:
+            audio_file_cache.popitem(last=False)
+    return audio_file
+
+
+def evict_cached_audio_file(file_path):
+    with audio_file_cache_lock:
+        audio_file_cache.pop((file_path, False), None)
+        audio_file_cache.pop((file_path, True), None)
+
+
+def keep_tag_size(padding_info):
+    """mutagen padding callback that never shrinks the existing tag.
+
+    Turning removed frames into padding lets mutagen rewrite just the tag
+    in place instead of moving the audio data of the whole file.
+    """
+
+    return max(padding_info.padding, 0)
 
-        apic_frames = (
-            audio_file.tags.getall('APIC')
-            if hasattr(audio_file.tags, 'getall')
-            else []
+
+def reserve_tag_padding(padding_info, minimum=MIN_TAG_PADDING):
+    """mutagen padding callback that keeps room for later tag edits.
+
+    Existing padding is never shrunk and at least minimum bytes are kept,
+    so the next edit usually fits inside the tag without moving the audio.
+    """
+
+    return max(padding_info.padding, minimum)
+
+
+def get_apic_frames(audio_file):
+    """Return the APIC frames of a loaded audio file, if its tags have any."""
+
+    if not audio_file or not audio_file.tags:
+        return []
+    if not hasattr(audio_file.tags, 'getall'):
+        return []
+    return audio_file.tags.getall('APIC')
+
+
+def decode_synchsafe(value):
+    """Decode a 28-bit ID3v2 synchsafe integer read as a plain uint32."""
+
+    return (
+        ((value & 0x7F000000) >> 3)
+        | ((value & 0x007F0000) >> 2)
+        | ((value & 0x00007F00) >> 1)
+        | (value & 0x0000007F)
+    )
+
+
+def read_id3_cover(file_path):
+    """Read the first APIC frame straight from the file's ID3v2 tag.
+
+    Only the tag is read, without mutagen's full MPEG parse. Returns
+    (mime, data), (None, None) when the tag has no APIC frame, or None when
+    the tag is missing or uses features this reader does not handle. data
+    is a memoryview into a read-only map of the file, which is unmapped
+    once the last view of it is released.
+    """
+
+    # Map the file so only the pages holding the tag are ever read
+    file_descriptor = os.open(file_path, os.O_RDONLY | O_BINARY)
+    try:
+        file_size = os.fstat(file_descriptor).st_size
+        if file_size < ID3_HEADER_SIZE:
+            return None
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(
+                file_descriptor,
+                0,
+                ID3_READAHEAD_SIZE,
+                os.POSIX_FADV_SEQUENTIAL,
+            )
+            os.posix_fadvise(
+                file_descriptor,
+                0,
+                ID3_READAHEAD_SIZE,
+                os.POSIX_FADV_WILLNEED,
+            )
+        file_map = mmap.mmap(file_descriptor, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(file_descriptor)
+
+    cover = None
+    try:
+        cover = find_apic_frame(file_map, file_size)
+    finally:
+        if cover is None or cover[1] is None:
+            file_map.close()
+    return cover
+
+
+def find_apic_frame(buffer, buffer_size):
+    """Walk the ID3v2 frames in buffer and parse the first APIC frame.
+
+    Frame headers are unpacked in place and the APIC payload is returned
+    as a memoryview, so nothing but the MIME type is copied out of buffer.
+    """
+
+    magic, major_version, _, tag_flags, tag_size = ID3_HEADER.unpack_from(
+        buffer
+    )
+    if magic != b'ID3':
+        return None
+    if major_version not in (3, 4) or tag_flags & ID3_UNSYNC_FLAG:
+        return None
+    tag_end = ID3_HEADER_SIZE + decode_synchsafe(tag_size)
+    if tag_end > buffer_size:
+        return None
+
+    position = ID3_HEADER_SIZE
+    if tag_flags & ID3_EXTENDED_HEADER_FLAG:
+        (extended_size,) = UINT32.unpack_from(buffer, position)
+        if major_version == 4:
+            position += decode_synchsafe(extended_size)
+        else:
+            position += 4 + extended_size
+
+    unpack_frame_header = ID3_FRAME_HEADER.unpack_from
+    format_flags = ID3_FRAME_FORMAT_FLAGS[major_version]
+    while position + ID3_FRAME_HEADER_SIZE <= tag_end:
+        frame_id, frame_size, frame_flags = unpack_frame_header(
+            buffer, position
         )
-        if not apic_frames:
-            return f'[SKIP] No cover art in "{file_path}"'
+        if frame_id[0] == 0:
+            break
+        if not frame_id.isalnum() or frame_id != frame_id.upper():
+            return None
+        if major_version == 4:
+            if frame_size & SYNCHSAFE_INVALID_BITS:
+                # Plain sizes written by some taggers; leave them to mutagen
+                return None
+            frame_size = decode_synchsafe(frame_size)
+        position += ID3_FRAME_HEADER_SIZE
+        if position + frame_size > tag_end:
+            return None
+        if frame_id == b'APIC':
+            if frame_flags & format_flags:
+                return None
+            # A plain size can still look synchsafe, so make sure the frame
+            # ends where another frame, the padding or the tag begins
+            if major_version == 4 and not is_frame_boundary(
+                buffer, position + frame_size, tag_end
+            ):
+                return None
+            return parse_apic_frame(buffer, position, position + frame_size)
+        position += frame_size
+    return None, None
 
-        cover_frame = apic_frames[0]
-        image_extension = cover_frame.mime.split('/')[-1]
-        file_basename = os.path.splitext(os.path.basename(file_path))[0]
-        output_path = os.path.join(
-            COVER_ART_DIR, f'{file_basename}.{image_extension}'
+
+def is_frame_boundary(buffer, position, tag_end):
+    """Whether a v2.4 frame, the padding or the end of the tag is at position.
+
+    Padding has to be zero bytes all the way to the end of the tag.
+    """
+
+    if position == tag_end or buffer[position] == 0:
+        return not any(buffer[position:tag_end])
+    if position + ID3_FRAME_HEADER_SIZE > tag_end:
+        return False
+    frame_id, frame_size, _ = ID3_FRAME_HEADER.unpack_from(buffer, position)
+    return (
+        frame_id.isalnum()
+        and frame_id == frame_id.upper()
+        and not frame_size & SYNCHSAFE_INVALID_BITS
+        and position + ID3_FRAME_HEADER_SIZE + decode_synchsafe(frame_size)
+        <= tag_end
+    )
+
+
+def parse_apic_frame(buffer, start, end):
+    """Split the APIC frame body in buffer[start:end] into (mime, data).
+
+    Returns None for a malformed frame, leaving it to mutagen.
+    """
+
+    if start >= end or buffer[start] > 3:
+        return None
+    encoding = buffer[start]
+    mime_end = buffer.find(b'\x00', start + 1, end)
+    if mime_end < 0:
+        return None
+    description_start = mime_end + 2
+    if encoding in (1, 2):
+        # UTF-16 descriptions end with a double null on a character boundary
+        description_end = buffer.find(b'\x00\x00', description_start, end)
+        while description_end >= 0 and (
+            (description_end - description_start) % 2
+        ):
+            description_end = buffer.find(
+                b'\x00\x00', description_end + 1, end
+            )
+        terminator_size = 2
+    else:
+        description_end = buffer.find(b'\x00', description_start, end)
+        terminator_size = 1
+    if description_end < 0:
+        return None
+    mime = buffer[start + 1 : mime_end].decode('latin-1')
+    if not (mime.isascii() and mime.isprintable()):
+        return None
+    try:
+        buffer[description_start:description_end].decode(
+            APIC_TEXT_ENCODINGS[encoding]
         )
+    except UnicodeDecodeError:
+        return None
+    return mime, memoryview(buffer)[description_end + terminator_size : end]
+
+
+def get_cover_output_directory(source_directory, source_roots=()):
+    """Return the folder under cover_art for covers of source_directory.
+
+    Files in one of the picked source_roots keep their path below it, so
+    covers of same-named tracks in different albums do not overwrite each
+    other; other files go straight into cover_art.
+    """
+
+    cache_key = (source_directory, source_roots)
+    output_directory = cover_output_directories.get(cache_key)
+    if output_directory is None:
+        output_directory = COVER_ART_DIR
+        source_directory = abspath(source_directory)
+        # The outermost picked folder wins, as its scan found the file
+        for source_root in sorted(map(abspath, source_roots), key=len):
+            if source_directory.startswith(join(source_root, '')) or (
+                source_directory == source_root
+            ):
+                output_directory = normpath(
+                    join(COVER_ART_DIR, relpath(source_directory, source_root))
+                )
+                break
+        os.makedirs(output_directory, exist_ok=True)
+        cover_output_directories[cache_key] = output_directory
+    return output_directory
+
+
+def save_cover_image(file_path, mime, data, source_roots=()):
+    """Queue the cover image for writing.
+
+    Returns the output path and the future of the queued write.
+    """
+
+    # Two rfind calls instead of split and splitext, which add up over
+    # large batches
+    name_start = max(file_path.rfind('/'), file_path.rfind(os.sep)) + 1
+    name_end = file_path.rfind('.')
+    if name_end <= name_start:
+        name_end = len(file_path)
+    image_type = mime[mime.rfind('/') + 1 :]
+    output_path = join(
+        get_cover_output_directory(file_path[:name_start], source_roots),
+        f'{file_path[name_start:name_end]}.{image_type}',
+    )
+    return output_path, queue_write(output_path, data)
+
+
+def copy_cover_art(file_path, source_roots=()):
+    """Copy and save the first APIC frame (cover art) from the audio file."""
 
-        with open(output_path, 'wb') as output_file:
-            output_file.write(cover_frame.data)
+    return copy_cover_art_group([file_path], source_roots)[0]
 
-        return f'[COPY] Cover art saved to "{output_path}"'
+
+def copy_cover_art_group(file_paths, source_roots=()):
+    """Copy the cover art of identical audio files, parsing only the first.
+
+    Returns one result per file, in the same order.
+    """
+
+    file_path = file_paths[0]
+    try:
+        cover = read_id3_cover(file_path)
+        if cover is None:
+            audio_file = read_audio_file(file_path)
+            if not audio_file or not audio_file.tags:
+                return [('SKIP', path, 'no-tags') for path in file_paths]
+            apic_frames = get_apic_frames(audio_file)
+            cover = (
+                (apic_frames[0].mime, apic_frames[0].data)
+                if apic_frames
+                else (None, None)
+            )
+
+        mime, data = cover
+        if data is None:
+            return [('SKIP', path, 'no-cover') for path in file_paths]
+
+        saved_images = [
+            save_cover_image(path, mime, data, source_roots)
+            for path in file_paths
+        ]
+        if isinstance(data, memoryview):
+            # Unmap the file once every copy of its cover is on disk
+            release_after_writes(
+                data, [write_future for _, write_future in saved_images]
+            )
+        return [
+            ('COPY', path, output_path)
+            for path, (output_path, _) in zip(file_paths, saved_images)
+        ]
     except Exception as error_info:
-        return f'[ERROR] Failed on "{file_path}": {error_info}'
+        return [('ERROR', path, str(error_info)) for path in file_paths]
+
+
+def group_duplicate_files(file_paths):
+    """Group files with the same size and the same first 64 KiB.
+
+    Sizes are compared first so only files that might be duplicates are
+    read and hashed.
+    """
+
+    paths_by_size = {}
+    groups = []
+    for file_path in file_paths:
+        try:
+            file_size = os.stat(file_path).st_size
+        except OSError:
+            groups.append([file_path])
+            continue
+        paths_by_size.setdefault(file_size, []).append(file_path)
+
+    for same_size_paths in paths_by_size.values():
+        if len(same_size_paths) == 1:
+            groups.append(same_size_paths)
+            continue
+        paths_by_digest = {}
+        for file_path in same_size_paths:
+            try:
+                with open(file_path, 'rb') as audio_file:
+                    digest = hashlib.blake2b(
+                        audio_file.read(DUPLICATE_HASH_SIZE), digest_size=16
+                    ).digest()
+            except OSError:
+                groups.append([file_path])
+                continue
+            paths_by_digest.setdefault(digest, []).append(file_path)
+        groups.extend(paths_by_digest.values())
+    return groups
 
 
 def delete_cover_art(file_path):
     """Delete the first APIC frame (cover art) from the audio file."""
 
     try:
-        audio_file = MutagenFile(file_path, easy=False)
+        # Check with the fast reader first so files without cover art are
+        # never loaded for writing.
+        if ReadOnlyMutagenFile is not MutagenFile and not get_apic_frames(
+            ReadOnlyMutagenFile(file_path)
+        ):
+            return ('SKIP', file_path, 'no-cover')
+
+        audio_file = load_audio_file(file_path)
         if not audio_file or not audio_file.tags:
-            return f'[SKIP] No tags to remove from "{file_path}"'
+            return ('SKIP', file_path, 'no-tags')
         assert audio_file.tags is not None
         if hasattr(audio_file.tags, 'delall'):
+            if not audio_file.tags.getall('APIC'):
+                return ('SKIP', file_path, 'no-cover')
             audio_file.tags.delall('APIC')
-            audio_file.save()
-            return f'[DELETE] Cover art removed from "{file_path}"'
-        return (
-            f'[SKIP] Tag format does not support cover deletion: "{file_path}"'
+            queue_save(file_path, audio_file, padding=keep_tag_size)
+            return ('DELETE', file_path, None)
+        return ('SKIP', file_path, 'unsupported')
+    except Exception as error_info:
+        return ('ERROR', file_path, str(error_info))
+
+
+def extract_cover_art(file_path, source_roots=()):
+    """Copy and remove cover art from the audio file."""
+
+    # Load once and delete from the same object instead of re-parsing
+    try:
+        audio_file = load_audio_file(file_path)
+        if not audio_file or not audio_file.tags:
+            return ('SKIP', file_path, 'no-tags')
+
+        apic_frames = get_apic_frames(audio_file)
+        if not apic_frames:
+            return ('SKIP', file_path, 'no-cover')
+
+        cover_frame = apic_frames[0]
+        output_path, write_future = save_cover_image(
+            file_path, cover_frame.mime, cover_frame.data, source_roots
         )
+        # Only strip the cover from the tag once its copy is safely on disk;
+        # a failed write is reported here rather than again by the batch
+        try:
+            write_future.result()
+        finally:
+            if pending_writes.get(output_path) is write_future:
+                pending_writes.pop(output_path, None)
+    except Exception as error_info:
+        return ('ERROR', file_path, str(error_info))
+
+    try:
+        audio_file.tags.delall('APIC')
+        queue_save(file_path, audio_file, padding=keep_tag_size)
     except Exception as error_info:
         return (
-            f'[ERROR] Could not delete cover art from "{file_path}": '
-            f'{error_info}'
+            'ERROR',
+            file_path,
+            f'cover art saved to "{output_path}" but not removed: '
+            f'{error_info}',
         )
+    return ('EXTRACT', file_path, output_path)
 
 
-def extract_cover_art(file_path):
-    """Copy and remove cover art from the audio file."""
+def detect_image_mime_type(image_data, image_path):
+    """Tell the image type from its leading bytes, else from its name."""
 
-    copy_result = copy_cover_art(file_path)
-    if '[COPY]' in copy_result:
-        delete_result = delete_cover_art(file_path)
-        return f'{copy_result}\n{delete_result}'
-    return copy_result
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if image_data.startswith(signature):
+            return mime_type
+    if image_data[:4] == b'RIFF' and image_data[8:12] == b'WEBP':
+        return 'image/webp'
+    image_extension = splitext(image_path)[1][1:].lower()
+    return f'image/{image_extension}'
 
 
-def replace_cover_art(file_path, image_path):
-    """Replace any existing cover art of the audio file with a new one."""
+def read_image(image_path):
+    """Read a cover image once; return its (image_data, mime_type)."""
 
-    try:
-        with open(image_path, 'rb') as image_file:
-            image_data = image_file.read()
+    with open(image_path, 'rb') as image_file:
+        image_data = image_file.read()
+    return image_data, detect_image_mime_type(image_data, image_path)
 
-        image_extension = os.path.splitext(image_path)[1][1:].lower()
-        mime_type = f'image/{image_extension}'
 
-        audio_file = MP3(file_path, ID3=ID3)
+def replace_cover_art(file_path, image_data, mime_type):
+    """Replace any existing cover art of the audio file with a new one."""
+
+    from mutagen.id3 import ID3
+    from mutagen.id3._frames import APIC
+    from mutagen.mp3 import MP3
+
+    try:
+        audio_file = load_audio_file(file_path, parser=partial(MP3, ID3=ID3))
         if audio_file.tags is None:
             audio_file.add_tags()
             assert audio_file.tags is not None
@@ -105,55 +800,367 @@ def replace_cover_art(file_path, image_path):
                 data=image_data,
             )
         )
-        audio_file.save(v2_version=3)
+        # Leave room for a somewhat larger cover to be swapped in later
+        padding = partial(
+            reserve_tag_padding,
+            minimum=max(len(image_data) // 4, MIN_TAG_PADDING),
+        )
+        queue_save(file_path, audio_file, v2_version=3, padding=padding)
 
-        return f'[REPLACE] Cover art replaced in "{file_path}"'
+        return ('REPLACE', file_path, None)
     except Exception as error_info:
-        return f'[ERROR] Failed on "{file_path}": {error_info}'
+        return ('ERROR', file_path, str(error_info))
+
+
+# Per-file function of each cover operation; COPY works on duplicate groups
+COVER_OPERATIONS = {
+    'COPY': copy_cover_art_group,
+    'DELETE': delete_cover_art,
+    'EXTRACT': extract_cover_art,
+    'REPLACE': replace_cover_art,
+}
+DEDUPLICATED_OPERATIONS = ('COPY',)
+# Operations writing cover images, laid out by the picked folders
+COVER_OUTPUT_OPERATIONS = ('COPY', 'EXTRACT')
+READ_ONLY_OPERATIONS = ('COPY',)
+
+
+def iter_audio_files(directory_path):
+    """Yield the audio files in directory_path and all its subdirectories.
+
+    Folders that cannot be read, such as locked system folders, are
+    skipped, and symlinked folders are not followed.
+    """
+
+    # Only the short extension is lowercased and looked up in a set
+    audio_extensions = AUDIO_EXTENSION_SET
+    for folder_path, _, file_names in os.walk(directory_path):
+        for file_name in file_names:
+            if splitext(file_name)[1].lower() in audio_extensions:
+                yield join(folder_path, file_name)
 
 
 def get_audio_files_from_directory(directory_path):
-    return [
-        os.path.join(directory_path, entry)
-        for entry in os.listdir(directory_path)
-        if entry.lower().endswith(AUDIO_EXTENSIONS)
+    return list(iter_audio_files(directory_path))
+
+
+def iter_chunks(items, chunk_size):
+    """Yield successive lists of up to chunk_size items."""
+
+    iterator = iter(items)
+    chunk = list(islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_size))
+
+
+def apply_write_error(result, errors):
+    """Turn result into an ERROR if a write it queued is in errors."""
+
+    status, path, detail = result
+    error = errors.pop(path, None)
+    if error is None and status in ('COPY', 'EXTRACT'):
+        error = errors.pop(detail, None)
+    if error is None:
+        return result
+    return ('ERROR', path, error[2])
+
+
+def run_batch_chunk(operation, file_paths):
+    """Apply the operation to each file and wait for its queued writes.
+
+    Returns the per-file results and {path: result} for failed writes
+    that do not belong to any of the results.
+    """
+
+    results = [operation(file_path) for file_path in file_paths]
+    errors = wait_for_pending_writes()
+    if errors:
+        # Report a failed write in place of the success its file reported
+        results = [
+            [apply_write_error(result, errors) for result in result_group]
+            if isinstance(result_group, list)
+            else apply_write_error(result_group, errors)
+            for result_group in results
+        ]
+    return results, errors
+
+
+def get_worker_count(read_only):
+    """Number of batch workers: threads for reads, processes for writes."""
+
+    cpu_count = os.cpu_count() or 1
+    return cpu_count * 2 if read_only else cpu_count
+
+
+def create_thread_pool():
+    return ThreadPoolExecutor(max_workers=get_worker_count(read_only=True))
+
+
+def create_process_pool():
+    # Workers are spawned rather than forked: a forked child would inherit
+    # io_pool and its locks without the threads behind them
+    return ProcessPoolExecutor(
+        max_workers=get_worker_count(read_only=False),
+        mp_context=multiprocessing.get_context('spawn'),
+    )
+
+
+def run_batch(
+    operation,
+    file_paths,
+    read_only=False,
+    report_results=None,
+    thread_pool=None,
+    process_pool=None,
+):
+    """Apply the operation to every file, in parallel workers if many.
+
+    Read-only operations run in threads, tag writes in processes; a pool
+    that is not given is created just for this batch.
+    """
+
+    if len(file_paths) < PARALLEL_MIN_FILES:
+        results, errors = run_batch_chunk(operation, file_paths)
+        if report_results is not None:
+            report_results(results)
+        return results, errors
+    worker_count = get_worker_count(read_only)
+    executor = thread_pool if read_only else process_pool
+    owns_executor = executor is None
+    if owns_executor:
+        executor = create_thread_pool() if read_only else create_process_pool()
+    # Split small batches evenly across the workers; cap the chunk size so
+    # large ones stay balanced as chunks finish at different speeds
+    chunk_size = min(PARALLEL_CHUNK_SIZE, -(-len(file_paths) // worker_count))
+    chunks = iter_chunks(file_paths, chunk_size)
+    results = []
+    errors = {}
+    try:
+        for chunk_results, chunk_errors in executor.map(
+            partial(run_batch_chunk, operation), chunks
+        ):
+            results.extend(chunk_results)
+            errors.update(chunk_errors)
+            if report_results is not None:
+                report_results(chunk_results)
+    finally:
+        if owns_executor:
+            executor.shutdown()
+    return results, errors
+
+
+def load_cover_index():
+    """Load the {path: [mtime_ns, size, has_cover]} index of past runs."""
+
+    try:
+        with open(COVER_INDEX_PATH, 'rb') as index_file:
+            data = index_file.read()
+        return orjson.loads(data) if orjson else json.loads(data)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cover_index(cover_index):
+    """Atomically replace the cover index file with cover_index."""
+
+    if orjson:
+        data = orjson.dumps(cover_index)
+    else:
+        data = json.dumps(cover_index).encode()
+    temporary_path = f'{COVER_INDEX_PATH}.tmp'
+    with open(temporary_path, 'wb') as index_file:
+        index_file.write(data)
+    os.replace(temporary_path, COVER_INDEX_PATH)
+
+
+def get_file_signature(file_path):
+    file_stat = os.stat(file_path)
+    return [file_stat.st_mtime_ns, file_stat.st_size]
+
+
+def cover_state_from_result(result):
+    """Tell from an operation result whether the file now has cover art.
+
+    Returns None when the result does not say, e.g. after an error.
+    """
+
+    status, _, detail = result
+    if status in ('COPY', 'REPLACE'):
+        return True
+    if status in ('DELETE', 'EXTRACT'):
+        return False
+    if status == 'SKIP' and detail in NO_COVER_SKIP_REASONS:
+        return False
+    return None
+
+
+def is_known_without_cover(cover_index, file_path):
+    """Whether the index shows the unchanged file has no cover art."""
+
+    entry = cover_index.get(abspath(file_path))
+    if entry is None or entry[2]:
+        return False
+    try:
+        return entry[:2] == get_file_signature(file_path)
+    except OSError:
+        return False
+
+
+def run_indexed_batch(
+    operation_name,
+    operation,
+    file_paths,
+    deduplicate=False,
+    report_results=None,
+    thread_pool=None,
+    process_pool=None,
+):
+    """Run a batch, skipping files the cover index shows need no work.
+
+    With deduplicate, the operation is called once per group of identical
+    files and returns one result per file in the group.
+    """
+
+    pools = {'thread_pool': thread_pool, 'process_pool': process_pool}
+
+    def report(results):
+        if report_results is not None and results:
+            report_results(results)
+
+    def report_groups(group_results):
+        report([result for results in group_results for result in results])
+
+    cover_index = load_cover_index()
+    if operation_name in COVER_INDEX_SKIPPABLE_OPERATIONS:
+        pending_paths = [
+            file_path
+            for file_path in file_paths
+            if not is_known_without_cover(cover_index, file_path)
+        ]
+    else:
+        pending_paths = list(file_paths)
+    pending_path_set = set(pending_paths)
+    report(
+        [
+            ('SKIP', file_path, 'unchanged')
+            for file_path in file_paths
+            if file_path not in pending_path_set
+        ]
+    )
+
+    if deduplicate:
+        groups = group_duplicate_files(pending_paths)
+        pending_paths = [file_path for group in groups for file_path in group]
+        group_results, errors = run_batch(
+            operation,
+            groups,
+            read_only=operation_name in READ_ONLY_OPERATIONS,
+            report_results=report_groups,
+            **pools,
+        )
+        batch_results = [
+            result for results in group_results for result in results
+        ]
+    else:
+        batch_results, errors = run_batch(
+            operation,
+            pending_paths,
+            read_only=operation_name in READ_ONLY_OPERATIONS,
+            report_results=report,
+            **pools,
+        )
+    results_by_path = dict(zip(pending_paths, batch_results))
+
+    for file_path, result in results_by_path.items():
+        index_key = abspath(file_path)
+        has_cover = (
+            None if file_path in errors else cover_state_from_result(result)
+        )
+        cover_index.pop(index_key, None)
+        if has_cover is not None:
+            try:
+                cover_index[index_key] = get_file_signature(file_path) + [
+                    has_cover
+                ]
+            except OSError:
+                pass
+    try:
+        save_cover_index(cover_index)
+    except OSError as error_info:
+        errors[COVER_INDEX_PATH] = ('ERROR', COVER_INDEX_PATH, str(error_info))
+    report(list(errors.values()))
+
+    results = [
+        results_by_path.get(file_path, ('SKIP', file_path, 'unchanged'))
+        for file_path in file_paths
     ]
+    return results + list(errors.values())
 
 
 def edit_metadata(file_path, updates):
     try:
-        audio_file = MutagenFile(file_path, easy=True)
+        audio_file = load_cached_audio_file(
+            file_path, easy=True, for_update=True
+        )
         if not audio_file:
-            return f'[ERROR] Could not open "{file_path}"'
+            return ('ERROR', file_path, 'unsupported audio file')
         for key, value in updates.items():
             if value:
                 audio_file[key] = value
-        audio_file.save()
-        return f'[UPDATE] Metadata saved in "{file_path}"'
+        save_with_retry(audio_file, file_path, padding=reserve_tag_padding)
+        return ('UPDATE', file_path, None)
     except Exception as error_info:
-        return f'[ERROR] Metadata edit failed on "{file_path}": {error_info}'
+        return ('ERROR', file_path, str(error_info))
+
+
+def edit_metadata_batch(
+    file_paths, updates, report_results=None, process_pool=None
+):
+    results, _ = run_batch(
+        partial(edit_metadata, updates=updates),
+        file_paths,
+        report_results=report_results,
+        process_pool=process_pool,
+    )
+    return results
+
+
+def read_metadata_fields(file_path):
+    """Read the editable fields of the file, or None if it has no tags.
+
+    Runs off the Tk thread; the parse is cached for a following edit.
+    """
+
+    audio_file = load_cached_audio_file(file_path, easy=True)
+    if not audio_file:
+        return None
+    return {field: audio_file.get(field, [''])[0] for field in METADATA_FIELDS}
 
 
 def populate_metadata_fields(
-    file_path, title_var, artist_var, album_var, genre_var, date_var
+    metadata, title_var, artist_var, album_var, genre_var, date_var
 ):
-    try:
-        audio_file = MutagenFile(file_path, easy=True)
-        if audio_file:
-            title_var.set(audio_file.get('title', [''])[0])
-            artist_var.set(audio_file.get('artist', [''])[0])
-            album_var.set(audio_file.get('album', [''])[0])
-            genre_var.set(audio_file.get('genre', [''])[0])
-            date_var.set(audio_file.get('date', [''])[0])
-    except Exception as error_info:
-        messagebox.showerror('Error', f'Failed to read metadata: {error_info}')
+    title_var.set(metadata['title'])
+    artist_var.set(metadata['artist'])
+    album_var.set(metadata['album'])
+    genre_var.set(metadata['genre'])
+    date_var.set(metadata['date'])
 
 
 def main():
     root = Tk()
     root.title('Audio Cover Art Manager & Metadata Editor')
+    # Keep the window hidden while it is built so it is laid out and
+    # drawn once, with all of its widgets in place
+    root.withdraw()
 
-    audio_selection = []
+    # A dict keeps the picked files in order without repeats
+    audio_selection = {}
+    # Folders the selection was scanned from, for laying out cover images
+    selected_folders = []
+    # Future of the folder scan whose files are to be selected next
+    folder_scan = None
     image_path_var = StringVar()
     path_display_var = StringVar()
 
@@ -163,57 +1170,235 @@ def main():
     genre_var = StringVar()
     date_var = StringVar()
 
-    def browse_files():
-        nonlocal audio_selection
-        files = list(
-            filedialog.askopenfilenames(
-                filetypes=[('Audio Files', AUDIO_FILE_PATTERN)]
+    # Batches run off the Tk thread so the window keeps repainting
+    batch_runner = ThreadPoolExecutor(max_workers=1)
+    # Reading a picked file's tags can be slow on network mounts
+    metadata_reader = ThreadPoolExecutor(max_workers=1)
+    # Kept for the whole session so worker processes are only started once
+    thread_pool = create_thread_pool()
+    process_pool = create_process_pool()
+
+    def exit_app():
+        for executor in (
+            thread_pool,
+            process_pool,
+            batch_runner,
+            metadata_reader,
+        ):
+            executor.shutdown(wait=False, cancel_futures=True)
+        # Interpreter exit still waits for chunks that are already running,
+        # so close the window first instead of leaving it frozen meanwhile
+        root.destroy()
+        sys.exit()
+
+    def run_with_result_window(title, total, batch_function, *args, **kwargs):
+        # Results stream from the batch thread through a queue and are
+        # added to the window in slices, so no single update stalls Tk
+        result_queue = queue.Queue()
+        batch_future = batch_runner.submit(
+            batch_function, *args, report_results=result_queue.put, **kwargs
+        )
+        batch_process_pool = kwargs.get('process_pool')
+
+        def replace_broken_process_pool(batch_future):
+            nonlocal process_pool
+            # A worker that crashed leaves its pool unusable for good, so
+            # start a new one for the next batch
+            if batch_future.cancelled() or not isinstance(
+                batch_future.exception(), BrokenProcessPool
+            ):
+                return
+            if batch_process_pool is process_pool:
+                process_pool = create_process_pool()
+                batch_process_pool.shutdown(wait=False)
+
+        batch_future.add_done_callback(replace_broken_process_pool)
+
+        window = Toplevel(root)
+        window.title(title)
+        progress = ttk.Progressbar(window, maximum=total, length=400)
+        progress.pack(fill='x', padx=5, pady=5)
+        result_text = ScrolledText(window, width=100, height=25)
+        result_text.pack(expand=True, fill='both')
+        pending_results = []
+        done_count = 0
+
+        def show_results():
+            nonlocal done_count
+            if not window.winfo_exists():
+                return
+            batch_done = batch_future.done()
+            while len(pending_results) < RESULTS_PER_TICK:
+                try:
+                    pending_results.extend(result_queue.get_nowait())
+                except queue.Empty:
+                    break
+            shown_results = pending_results[:RESULTS_PER_TICK]
+            del pending_results[:RESULTS_PER_TICK]
+            if shown_results:
+                result_text.insert(
+                    'end',
+                    ''.join(f'{format_result(r)}\n' for r in shown_results),
+                )
+                result_text.see('end')
+                done_count += len(shown_results)
+                # Failed writes add results beyond one per file
+                progress['value'] = min(done_count, total)
+
+            finished = (
+                batch_done and result_queue.empty() and not pending_results
             )
+            if not finished:
+                root.after(RESULT_POLL_INTERVAL_MS, show_results)
+            elif batch_future.exception() is not None:
+                result_text.insert(
+                    'end', f'[ERROR] {batch_future.exception()}\n'
+                )
+                if isinstance(batch_future.exception(), BrokenProcessPool):
+                    result_text.insert(
+                        'end', '[ERROR] Workers restarted; run it again.\n'
+                    )
+
+        show_results()
+
+    def select_audio_files(file_paths, description, add=False, folder=None):
+        nonlocal audio_selection, selected_folders, folder_scan
+        # Any folder still being scanned is superseded by this pick
+        folder_scan = None
+        if not add:
+            audio_selection = {}
+            selected_folders = []
+        if folder is not None and folder not in selected_folders:
+            selected_folders.append(folder)
+        audio_selection.update(dict.fromkeys(file_paths))
+        if add:
+            description = f'{len(audio_selection)} files selected'
+        path_display_var.set(description)
+        if len(audio_selection) == 1:
+            (file_path,) = audio_selection
+            metadata_future = metadata_reader.submit(
+                read_metadata_fields, file_path
+            )
+            populate_when_read(file_path, metadata_future)
+
+    def browse_files(add=False):
+        files = filedialog.askopenfilenames(
+            parent=root, filetypes=[('Audio Files', AUDIO_FILE_PATTERN)]
         )
-        audio_selection = files
-        path_display_var.set('; '.join(files))
-        if len(files) == 1:
+        if not files and add:
+            return
+        select_audio_files(files, '; '.join(files), add=add)
+
+    def populate_when_read(file_path, metadata_future):
+        if not metadata_future.done():
+            root.after(
+                RESULT_POLL_INTERVAL_MS,
+                populate_when_read,
+                file_path,
+                metadata_future,
+            )
+            return
+        if list(audio_selection) != [file_path]:
+            # The selection changed while the file was being read
+            return
+        try:
+            metadata = metadata_future.result()
+        except Exception as error_info:
+            messagebox.showerror(
+                'Error', f'Failed to read metadata: {error_info}', parent=root
+            )
+            return
+        if metadata:
             populate_metadata_fields(
-                files[0], title_var, artist_var, album_var, genre_var, date_var
+                metadata, title_var, artist_var, album_var, genre_var, date_var
             )
 
-    def browse_folder():
-        nonlocal audio_selection
-        folder = filedialog.askdirectory()
-        audio_selection = get_audio_files_from_directory(folder)
-        path_display_var.set(folder)
+    def browse_folder(add=False):
+        nonlocal folder_scan
+        folder = filedialog.askdirectory(parent=root)
+        if not folder:
+            return
+        # Large trees take a while to list, so scan them off the Tk thread
+        path_display_var.set(f'Scanning {folder}...')
+        folder_scan = metadata_reader.submit(
+            get_audio_files_from_directory, folder
+        )
+        select_when_scanned(folder, folder_scan, add)
+
+    def select_when_scanned(folder, scan_future, add):
+        if not scan_future.done():
+            root.after(
+                RESULT_POLL_INTERVAL_MS,
+                select_when_scanned,
+                folder,
+                scan_future,
+                add,
+            )
+            return
+        if scan_future is not folder_scan:
+            # Another pick was made while the folder was being scanned
+            return
+        try:
+            file_paths = scan_future.result()
+        except Exception as error_info:
+            messagebox.showerror(
+                'Error', f'Failed to scan folder: {error_info}', parent=root
+            )
+            return
+        select_audio_files(file_paths, folder, add=add, folder=folder)
 
     def browse_image():
         image_path_var.set(
             filedialog.askopenfilename(
-                filetypes=[('Image Files', IMAGE_FILE_PATTERN)]
+                parent=root, filetypes=[('Image Files', IMAGE_FILE_PATTERN)]
             )
         )
 
     def run_cover_op(operation):
         if not audio_selection:
-            messagebox.showerror('Error', 'No audio files selected.')
+            messagebox.showerror(
+                'Error', 'No audio files selected.', parent=root
+            )
             return
-        results = []
-        for file_path in audio_selection:
-            if operation == 'COPY':
-                results.append(copy_cover_art(file_path))
-            elif operation == 'DELETE':
-                results.append(delete_cover_art(file_path))
-            elif operation == 'EXTRACT':
-                results.append(extract_cover_art(file_path))
-            elif operation == 'REPLACE':
-                if not image_path_var.get():
-                    messagebox.showerror('Error', 'Select an image file.')
-                    return
-                results.append(
-                    replace_cover_art(file_path, image_path_var.get())
+        cover_operation = COVER_OPERATIONS[operation]
+        if operation == 'REPLACE':
+            if not image_path_var.get():
+                messagebox.showerror(
+                    'Error', 'Select an image file.', parent=root
                 )
-        messagebox.showinfo('Result', '\n'.join(results))
+                return
+            try:
+                image_data, mime_type = read_image(image_path_var.get())
+            except OSError as error_info:
+                messagebox.showerror(
+                    'Error', f'Could not read image: {error_info}', parent=root
+                )
+                return
+            cover_operation = partial(
+                cover_operation, image_data=image_data, mime_type=mime_type
+            )
+        elif operation in COVER_OUTPUT_OPERATIONS:
+            cover_operation = partial(
+                cover_operation, source_roots=tuple(selected_folders)
+            )
+        file_paths = list(audio_selection)
+        run_with_result_window(
+            'Result',
+            len(file_paths),
+            run_indexed_batch,
+            operation,
+            cover_operation,
+            file_paths,
+            deduplicate=operation in DEDUPLICATED_OPERATIONS,
+            thread_pool=thread_pool,
+            process_pool=process_pool,
+        )
 
     def run_metadata_edit(batch=False):
         if not audio_selection:
-            messagebox.showerror('Error', 'No audio files selected.')
+            messagebox.showerror(
+                'Error', 'No audio files selected.', parent=root
+            )
             return
         updates = {
             'title': title_var.get(),
@@ -222,9 +1407,17 @@ def main():
             'genre': genre_var.get(),
             'date': date_var.get(),
         }
-        targets = audio_selection if batch else [audio_selection[0]]
-        results = [edit_metadata(f, updates) for f in targets]
-        messagebox.showinfo('Metadata Result', '\n'.join(results))
+        targets = list(audio_selection)
+        if not batch:
+            targets = targets[:1]
+        run_with_result_window(
+            'Metadata Result',
+            len(targets),
+            edit_metadata_batch,
+            targets,
+            updates,
+            process_pool=process_pool,
+        )
 
     notebook = ttk.Notebook(root)
 
@@ -249,6 +1442,12 @@ def main():
     ttk.Button(cover_tab, text='Browse Files', command=browse_files).grid(
         row=0, column=4
     )
+    ttk.Button(
+        cover_tab, text='Add Folder', command=lambda: browse_folder(add=True)
+    ).grid(row=0, column=5)
+    ttk.Button(
+        cover_tab, text='Add Files', command=lambda: browse_files(add=True)
+    ).grid(row=0, column=6)
 
     ttk.Label(cover_tab, text='Image (for REPLACE):').grid(
         row=1, column=0, sticky='w'
@@ -310,9 +1509,10 @@ def main():
         command=lambda: run_metadata_edit(batch=True),
     ).grid(row=5, column=2)
 
-    ttk.Button(root, text='Exit', command=sys.exit).pack(pady=10)
+    ttk.Button(root, text='Exit', command=exit_app).pack(pady=10)
 
-    root.protocol('WM_DELETE_WINDOW', sys.exit)
+    root.protocol('WM_DELETE_WINDOW', exit_app)
+    root.deiconify()
     root.mainloop()
 
 